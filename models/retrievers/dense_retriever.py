@@ -1,12 +1,38 @@
-from sentence_transformers import SentenceTransformer
-import numpy as np
-import faiss
 import os 
-from typing import List, Dict
+from typing import List, Dict, TYPE_CHECKING
 from scripts.logging_config import logger
+from utils.metrics import metrics
 
+# numpy, faiss and sentence_transformers (which pulls in torch) are imported
+# inside the functions that need them so that importing this module stays cheap
+if TYPE_CHECKING:
+    import numpy as np
+    import faiss
+    from sentence_transformers import SentenceTransformer
 
-def compute_embeddings(chunks: List[Dict], model_name = 'all-MiniLM-L6-V2') -> np.ndarray:
+# FAISS asks for at least this many training vectors per IVF cluster
+MIN_VECTORS_PER_CLUSTER = 39
+
+
+def load_embedding_model(model_name: str = 'all-MiniLM-L6-v2') -> 'SentenceTransformer':
+    """
+    Loads a SentenceTransformer embedding model.
+
+    Args:
+        model_name (str): Pretrained SentenceTransformer model name.
+
+    Returns:
+        SentenceTransformer: The embedding model.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    with metrics.timer('model_load'):
+        model = SentenceTransformer(model_name)
+    logger.info(f"Loaded embedding model '{model_name}'")
+    return model
+
+
+def compute_embeddings(chunks: List[Dict], model_name = 'all-MiniLM-L6-V2') -> 'np.ndarray':
     """
     Computes embeddings for each text chunk using Sentence-BERT.
 
@@ -18,9 +44,10 @@ def compute_embeddings(chunks: List[Dict], model_name = 'all-MiniLM-L6-V2') -> n
         np.ndarray: Array of embeddings.
     """
     try:
-        model = SentenceTransformer(model_name)
+        model = load_embedding_model(model_name)
         texts = [chunk['text'] for chunk in chunks]
-        embeddings = model.encode(texts, show_progress_bar = True)
+        with metrics.timer('corpus_embedding'):
+            embeddings = model.encode(texts, show_progress_bar = True)
         logger.info(f"Computed embeddings for {len(chunks)} chunks using model'{model_name}'")
         return embeddings
     
@@ -28,28 +55,48 @@ def compute_embeddings(chunks: List[Dict], model_name = 'all-MiniLM-L6-V2') -> n
         logger.error(f"Error computing embeddings: {e}")
         raise
 
-def build_faiss_index(embeddings: np.ndarray) -> faiss.Index:
+def build_faiss_index(embeddings: 'np.ndarray', index_type: str = 'flat', nlist: int = 100, nprobe: int = 8, hnsw_m: int = 32, ef_search: int = 16) -> 'faiss.Index':
     """
     Builds a FAISS index from embeddings.
 
     Args:
         embeddings (np.ndarray): Array of embeddings.
+        index_type (str): 'flat' (exact search), 'ivf' or 'hnsw' (approximate search).
+        nlist (int): Number of IVF clusters, capped so that every cluster is
+            trained on at least MIN_VECTORS_PER_CLUSTER vectors.
+        nprobe (int): Number of IVF clusters visited per query.
+        hnsw_m (int): Number of neighbours per node in the HNSW graph.
+        ef_search (int): Size of the HNSW candidate list at query time.
 
     Returns:
         faiss.Index: The FAISS index object.
     """
+    import faiss
+
     try:
         dimension = embeddings.shape[1]
-        index = faiss.IndexFlatL2(dimension)
+        if index_type == 'flat':
+            index = faiss.IndexFlatL2(dimension)
+        elif index_type == 'ivf':
+            quantizer = faiss.IndexFlatL2(dimension)
+            nlist = max(1, min(nlist, len(embeddings) // MIN_VECTORS_PER_CLUSTER))
+            index = faiss.IndexIVFFlat(quantizer, dimension, nlist)
+            index.train(embeddings)
+            index.nprobe = nprobe
+        elif index_type == 'hnsw':
+            index = faiss.IndexHNSWFlat(dimension, hnsw_m)
+            index.hnsw.efSearch = ef_search
+        else:
+            raise ValueError(f"Unknown FAISS index type '{index_type}'")
         index.add(embeddings)
-        logger.info(f"FAISS index built with {index.ntotal} vectors")
+        logger.info(f"FAISS {index_type} index built with {index.ntotal} vectors")
         return index
     
     except Exception as e: 
         logger.error(f"Error building FAISS index: {e}")
         raise
 
-def save_faiss_index(index: faiss.Index, index_file_path: str):
+def save_faiss_index(index: 'faiss.Index', index_file_path: str):
     """
     Saves a FAISS index to disk.
 
@@ -60,6 +107,8 @@ def save_faiss_index(index: faiss.Index, index_file_path: str):
     Returns:
         None
     """
+    import faiss
+
     try:
         directory = os.path.dirname(index_file_path)
         if directory and not os.path.exists(directory):
@@ -74,7 +123,7 @@ def save_faiss_index(index: faiss.Index, index_file_path: str):
         raise
 
 
-def load_faiss_index(index_file_path:str) -> faiss.Index:
+def load_faiss_index(index_file_path:str) -> 'faiss.Index':
     """
     Loads a FAISS index from disk.
 
@@ -84,11 +133,14 @@ def load_faiss_index(index_file_path:str) -> faiss.Index:
     Returns:
         faiss.Index: The loaded FAISS index object.
     """
+    import faiss
+
     try:
         if not os.path.exists(index_file_path):
             raise FileNotFoundError(f"FAISS index file not found at {index_file_path}")
 
-        index = faiss.read_index(index_file_path)
+        with metrics.timer('index_load'):
+            index = faiss.read_index(index_file_path)
         logger.info(f"FAISS index loaded from {index_file_path}")
         return index
     except Exception as e:
@@ -96,7 +148,7 @@ def load_faiss_index(index_file_path:str) -> faiss.Index:
         raise
 
 
-def query_faiss_index(query_text: str, index: faiss.Index, model: SentenceTransformer, metadata: List[Dict], top_k: int = 15) -> List[Dict]:
+def query_faiss_index(query_text: str, index: 'faiss.Index', model: 'SentenceTransformer', metadata: List[Dict], top_k: int = 15) -> List[Dict]:
     """
     Queries the FAISS index to retrieve the most similar documents.
 
@@ -110,30 +162,55 @@ def query_faiss_index(query_text: str, index: faiss.Index, model: SentenceTransf
     Returns:
         List[Dict]: A list of dictionaries containing retrieved documents and their metadata.
     """
+    return query_faiss_index_batch([query_text], index, model, metadata, top_k)[0]
+
+
+def query_faiss_index_batch(query_texts: List[str], index: 'faiss.Index', model: 'SentenceTransformer', metadata: List[Dict], top_k: int = 15) -> List[List[Dict]]:
+    """
+    Queries the FAISS index for several queries at once, encoding and
+    searching them as a single batch.
+
+    Args:
+        query_texts (List[str]): The search queries.
+        index (faiss.Index): The FAISS index object.
+        model (SentenceTransformer): The embedding model.
+        metadata (List[Dict]): List of metadata dictionaries corresponding to the index.
+        top_k (int): Number of top documents to retrieve per query.
+
+    Returns:
+        List[List[Dict]]: One list of retrieved documents per query, in query order.
+    """
+    import numpy as np
 
     try: 
-        query_embedding = model.encode([query_text])
-        distances, indices = index.search(np.array(query_embedding), top_k)
-        logger.info(f"FAISS query executed succesfully for query: '{query_text}")
-
-        results = []
-        for idx, distance in zip(indices[0], distances[0]):
-            if idx < len(metadata):
-                doc_metadata = metadata[idx]
-                result = {
-                    'chunk_id': doc_metadata.get('chunk_id'),
-                    'document_id': doc_metadata.get('document_id'),
-                    'heading': doc_metadata.get('heading'),
-                    'text': doc_metadata.get('text'),
-                    'score': float(distance)
-                }
-                results.append(result)
-            else:
-                logger.warning(f"Index {idx} is out of bounds for metadatalist")
-            
-        logger.info(f"Index {idx} is out of bounds for metadata list")
-        return results
+        with metrics.timer('query_embedding'):
+            query_embeddings = model.encode(query_texts)
+        with metrics.timer('dense_search'):
+            distances, indices = index.search(np.array(query_embeddings), top_k)
+        logger.info(f"FAISS query executed succesfully for {len(query_texts)} queries")
+
+        batch_results = []
+        with metrics.timer('metadata_lookup'):
+            for row_indices, row_distances in zip(indices, distances):
+                results = []
+                for idx, distance in zip(row_indices, row_distances):
+                    # FAISS pads with -1 when fewer than top_k vectors exist
+                    if 0 <= idx < len(metadata):
+                        doc_metadata = metadata[idx]
+                        result = {
+                            'chunk_id': doc_metadata.get('chunk_id'),
+                            'document_id': doc_metadata.get('document_id'),
+                            'heading': doc_metadata.get('heading'),
+                            'text': doc_metadata.get('text'),
+                            'score': float(distance)
+                        }
+                        results.append(result)
+                    else:
+                        logger.warning(f"Index {idx} is out of bounds for metadatalist")
+                batch_results.append(results)
+
+        return batch_results
     
     except Exception as e:
         logger.error(f"Error querying FAISS index: {e}")
-        return[]
\ No newline at end of file
+        return [[] for _ in query_texts]
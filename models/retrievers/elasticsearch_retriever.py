@@ -1,12 +1,16 @@
-from elasticsearch import Elasticsearch, helpers
 from typing import List, Dict
 import os
-import dotenv
 from scripts.logging_config import logger
+from utils.metrics import metrics
 
-dotenv.load_dotenv()
+# The elasticsearch client and dotenv are imported on first use so that
+# importing this module does not pay for them.
 
 def index_chunks_in_elasticsearch(chunks, index_name = 'legal_docs'):
+    import dotenv
+    from elasticsearch import Elasticsearch, helpers
+
+    dotenv.load_dotenv()
     es_url = os.getenv('ELASTICSEARCH_URL')
     es = Elasticsearch(
         es_url,
@@ -42,6 +46,8 @@ def query_elasticsearch(query_text:str, index_name:str, host: str = 'localhost',
     Returns:
         List[Dict]: A list of dictionaries containing retrieved documents and their metadata.
     """
+    from elasticsearch import Elasticsearch
+
     try:
         es = Elasticsearch([{'host':host, 'port': port}])
         logger.info(f"Connected to Elasticsearch at {host}:{port}")
@@ -60,7 +66,8 @@ def query_elasticsearch(query_text:str, index_name:str, host: str = 'localhost',
         }
 
         #Execute the search 
-        response = es.search(index = index_name , body= search_query)
+        with metrics.timer('sparse_search'):
+            response = es.search(index = index_name , body= search_query)
         logger.info(f"Elasticsearch query executed successfully for query: '{query_text}'")
 
 
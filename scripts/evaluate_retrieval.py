@@ -0,0 +1,300 @@
+import argparse
+import json
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from typing import List, Dict, Callable
+from logging_config import logger
+from utils.chunker import fixed_length_chunking
+from utils.retrieval_metrics import recall_at_k, reciprocal_rank, ndcg_at_k, overlap_at_k, percentile, dedupe
+
+
+def load_labeled_queries(labels_file: str) -> List[Dict]:
+    """
+    Loads labeled queries from a JSONL file. Each line holds a 'query' and
+    the list of 'relevant_chunk_ids' for it.
+
+    Args:
+        labels_file (str): Path to the JSONL file.
+
+    Returns:
+        List[Dict]: List of {'query', 'relevant_chunk_ids'} dictionaries.
+    """
+    queries = []
+    with open(labels_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                record = json.loads(line)
+                queries.append({'query': record['query'], 'relevant_chunk_ids': record['relevant_chunk_ids']})
+    logger.info(f"Loaded {len(queries)} labeled queries from {labels_file}")
+    return queries
+
+
+def rechunk(metadata: List[Dict], chunk_size: int) -> List[Dict]:
+    """
+    Splits the indexed chunks into chunks of at most `chunk_size` words.
+    Every sub-chunk remembers the chunk it came from so that the labels,
+    which refer to the indexed chunk ids, stay valid.
+
+    Args:
+        metadata (List[Dict]): Indexed chunks with metadata.
+        chunk_size (int): Maximum number of words per sub-chunk.
+
+    Returns:
+        List[Dict]: Sub-chunks with a 'parent_chunk_id' field.
+    """
+    sub_chunks = []
+    for chunk in metadata:
+        for idx, text in enumerate(fixed_length_chunking(chunk['text'], max_length=chunk_size)):
+            sub_chunks.append({
+                **chunk,
+                'chunk_id': f"{chunk['chunk_id']}#{idx}",
+                'parent_chunk_id': chunk['chunk_id'],
+                'text': text,
+            })
+    return sub_chunks
+
+
+def effective_chunk_sizes(chunk_sizes: List[int], metadata: List[Dict]) -> List[int]:
+    """
+    Maps chunk sizes that cannot split any indexed chunk to 0 (the indexed
+    chunks as they are) and drops repeated settings.
+
+    Args:
+        chunk_sizes (List[int]): Requested chunk sizes in words.
+        metadata (List[Dict]): Indexed chunks with metadata.
+
+    Returns:
+        List[int]: Distinct chunk sizes to evaluate, in request order.
+    """
+    longest = max((len(chunk['text'].split()) for chunk in metadata), default=0)
+    sizes = []
+    for chunk_size in chunk_sizes:
+        if chunk_size and chunk_size >= longest:
+            logger.warning(f"Chunk size {chunk_size} does not split any indexed chunk (longest has {longest} words), evaluating the indexed chunks instead")
+            chunk_size = 0
+        if chunk_size not in sizes:
+            sizes.append(chunk_size)
+    return sizes
+
+
+def effective_nprobes(nprobes: List[int], nlist: int) -> List[int]:
+    """
+    Caps nprobe at nlist, where IVF search visits every cluster and becomes
+    exact, and drops repeated settings.
+
+    Args:
+        nprobes (List[int]): Requested numbers of clusters visited per query.
+        nlist (int): Number of clusters of the IVF index.
+
+    Returns:
+        List[int]: Distinct nprobe values to evaluate, in request order.
+    """
+    values = []
+    for nprobe in nprobes:
+        if nprobe > nlist:
+            logger.warning(f"nprobe {nprobe} exceeds nlist {nlist}, evaluating nprobe {nlist} (exhaustive search) instead")
+            nprobe = nlist
+        if nprobe not in values:
+            values.append(nprobe)
+    return values
+
+
+def evaluate(queries: List[Dict], search: Callable[[str, int], List[Dict]], top_k: int, parents: Dict = None, exact_ids: List[List[str]] = None) -> Dict:
+    """
+    Runs every labeled query through `search` and scores the results.
+
+    Args:
+        queries (List[Dict]): Labeled queries.
+        search (Callable): Function (query, top_k) -> retrieved chunks.
+        top_k (int): Number of chunks retrieved per query.
+        parents (Dict, optional): Maps sub-chunk ids to the labeled chunk ids.
+        exact_ids (List[List[str]], optional): Exact search results per query,
+            used to compute the recall of approximate indexes.
+
+    Returns:
+        Dict: Averaged quality metrics and latency percentiles in milliseconds.
+    """
+    parents = parents or {}
+    recalls, rrs, ndcgs, overlaps, latencies = [], [], [], [], []
+
+    for i, item in enumerate(queries):
+        start = time.perf_counter()
+        results = search(item['query'], top_k)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+        chunk_ids = [result['chunk_id'] for result in results]
+        if exact_ids is not None:
+            overlaps.append(overlap_at_k(chunk_ids, exact_ids[i], top_k))
+
+        retrieved_ids = dedupe([parents.get(chunk_id, chunk_id) for chunk_id in chunk_ids])
+        relevant_ids = item['relevant_chunk_ids']
+        recalls.append(recall_at_k(retrieved_ids, relevant_ids, top_k))
+        rrs.append(reciprocal_rank(retrieved_ids, relevant_ids))
+        ndcgs.append(ndcg_at_k(retrieved_ids, relevant_ids, top_k))
+
+    count = len(queries) or 1
+    return {
+        'recall': sum(recalls) / count,
+        'mrr': sum(rrs) / count,
+        'ndcg': sum(ndcgs) / count,
+        'ann_recall': sum(overlaps) / count if exact_ids is not None else None,
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+    }
+
+
+def sweep_dense(queries: List[Dict], args) -> List[Dict]:
+    """
+    Evaluates dense retrieval for every combination of chunk size, index
+    type, query-time search setting (IVF nprobe, HNSW efSearch) and top_k.
+    Exact flat search over the same chunks is the ground
+    truth for the recall of the approximate indexes.
+
+    Args:
+        queries (List[Dict]): Labeled queries.
+        args (argparse.Namespace): Parsed evaluation arguments.
+
+    Returns:
+        List[Dict]: One result row per configuration.
+    """
+    from retrieval import load_dense_retriever
+    from models.retrievers.dense_retriever import build_faiss_index, query_faiss_index, query_faiss_index_batch
+
+    dense_retriever = load_dense_retriever(args.faiss_index_file, args.metadata_file)
+    model = dense_retriever['model']
+    query_texts = [item['query'] for item in queries]
+    rows = []
+
+    for chunk_size in effective_chunk_sizes(args.chunk_sizes, dense_retriever['metadata']):
+        if chunk_size:
+            corpus = rechunk(dense_retriever['metadata'], chunk_size)
+            embeddings = model.encode([chunk['text'] for chunk in corpus])
+            logger.info(f"Re-chunked corpus into {len(corpus)} chunks of at most {chunk_size} words")
+        else:
+            # Reuse the stored vectors of the indexed chunks
+            corpus = dense_retriever['metadata']
+            embeddings = dense_retriever['index'].reconstruct_n(0, dense_retriever['index'].ntotal)
+        parents = {chunk['chunk_id']: chunk.get('parent_chunk_id', chunk['chunk_id']) for chunk in corpus}
+
+        flat_index = build_faiss_index(embeddings, index_type='flat')
+        exact_results = query_faiss_index_batch(query_texts, flat_index, model, corpus, top_k=max(args.top_k))
+        exact_ids = [[result['chunk_id'] for result in results] for results in exact_results]
+
+        for index_type in args.index_types:
+            if index_type == 'flat':
+                index = flat_index
+            else:
+                index = build_faiss_index(embeddings, index_type=index_type, nlist=args.nlist, hnsw_m=args.hnsw_m)
+
+            def search(query, top_k):
+                return query_faiss_index(query, index, model, corpus, top_k=top_k)
+
+            # nprobe and efSearch are query-time settings, so one index serves the whole sweep
+            if index_type == 'ivf':
+                search_params = [{'nlist': index.nlist, 'nprobe': nprobe} for nprobe in effective_nprobes(args.nprobe, index.nlist)]
+            elif index_type == 'hnsw':
+                search_params = [{'ef_search': ef_search} for ef_search in args.ef_search]
+            else:
+                search_params = [{}]
+
+            for params in search_params:
+                if 'nprobe' in params:
+                    index.nprobe = params['nprobe']
+                if 'ef_search' in params:
+                    index.hnsw.efSearch = params['ef_search']
+
+                for top_k in args.top_k:
+                    rows.append({
+                        'method': 'dense',
+                        'index_type': index_type,
+                        'chunk_size': chunk_size or None,
+                        'nlist': params.get('nlist'),
+                        'nprobe': params.get('nprobe'),
+                        'ef_search': params.get('ef_search'),
+                        'top_k': top_k,
+                        **evaluate(queries, search, top_k, parents=parents, exact_ids=exact_ids),
+                    })
+    return rows
+
+
+def sweep_sparse(queries: List[Dict], args) -> List[Dict]:
+    """
+    Evaluates Elasticsearch retrieval for every top_k. Index type and chunk
+    size do not apply to the sparse index.
+
+    Args:
+        queries (List[Dict]): Labeled queries.
+        args (argparse.Namespace): Parsed evaluation arguments.
+
+    Returns:
+        List[Dict]: One result row per top_k.
+    """
+    from models.retrievers.elasticsearch_retriever import query_elasticsearch
+
+    def search(query, top_k):
+        return query_elasticsearch(query_text=query, index_name=args.elasticsearch_index, top_k=top_k)
+
+    return [
+        {'method': 'sparse', 'index_type': None, 'chunk_size': None, 'nlist': None, 'nprobe': None, 'ef_search': None,
+         'top_k': top_k, **evaluate(queries, search, top_k)}
+        for top_k in args.top_k
+    ]
+
+
+def format_table(rows: List[Dict]) -> str:
+    columns = ['method', 'index_type', 'chunk_size', 'nlist', 'nprobe', 'ef_search', 'top_k', 'recall', 'mrr', 'ndcg', 'ann_recall', 'p50_ms', 'p95_ms']
+    header = ' '.join(f"{column:>10}" for column in columns)
+    lines = [header, '-' * len(header)]
+    for row in rows:
+        cells = []
+        for column in columns:
+            value = row[column]
+            if value is None:
+                value = '-'
+            elif isinstance(value, float):
+                value = f"{value:.3f}" if column not in ('p50_ms', 'p95_ms') else f"{value:.1f}"
+            cells.append(f"{value:>10}")
+        lines.append(' '.join(cells))
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure retrieval quality against latency over a parameter sweep.")
+    parser.add_argument('--labels_file', type=str, required=True, help='JSONL file of {"query", "relevant_chunk_ids"} lines')
+    parser.add_argument('--methods', type=str, nargs='+', choices=['sparse', 'dense'], default=['dense'], help='Retrieval methods to evaluate')
+    parser.add_argument('--index_types', type=str, nargs='+', choices=['flat', 'ivf', 'hnsw'], default=['flat', 'ivf', 'hnsw'], help='FAISS index types to evaluate')
+    parser.add_argument('--top_k', type=int, nargs='+', default=[5, 10, 15], help='Numbers of chunks to retrieve')
+    parser.add_argument('--chunk_sizes', type=int, nargs='+', default=[0], help='Chunk sizes in words to re-chunk the corpus into (0 keeps the indexed chunks)')
+    parser.add_argument('--nlist', type=int, default=100, help='Number of IVF clusters (capped for small corpora)')
+    parser.add_argument('--nprobe', type=int, nargs='+', default=[1, 4, 8, 16], help='Numbers of IVF clusters visited per query')
+    parser.add_argument('--ef_search', type=int, nargs='+', default=[16, 32, 64, 128], help='HNSW candidate list sizes at query time')
+    parser.add_argument('--hnsw_m', type=int, default=32, help='Number of neighbours per HNSW node')
+    parser.add_argument('--faiss_index_file', type=str, default='data/embeddings/faiss_index.index', help='Path to FAISS index file')
+    parser.add_argument('--metadata_file', type=str, default='data/embeddings/chunk_metadata.json', help='Path to metadata JSON file')
+    parser.add_argument('--elasticsearch_index', type=str, default='legal_docs', help='Elasticsearch index name')
+    parser.add_argument('--output_file', type=str, default='results/retrieval_eval.jsonl', help='Path to save the result rows')
+
+    args = parser.parse_args()
+
+    queries = load_labeled_queries(args.labels_file)
+    rows = []
+    if 'sparse' in args.methods:
+        rows.extend(sweep_sparse(queries, args))
+    if 'dense' in args.methods:
+        rows.extend(sweep_dense(queries, args))
+
+    print(format_table(rows))
+
+    if args.output_file:
+        directory = os.path.dirname(args.output_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.output_file, 'w', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row) + '\n')
+        logger.info(f"Evaluation results saved to {args.output_file}")
+
+if __name__ == '__main__':
+    main()
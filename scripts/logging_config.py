@@ -1,18 +1,32 @@
 import logging
 import os
 
-# Create a logs directory if it doesn't exist
+# Logs directory, created on the first log record rather than at import
 LOGS_DIR = "logs"
-os.makedirs(LOGS_DIR, exist_ok=True)
 
 # Configure logging
 LOG_FILE = os.path.join(LOGS_DIR, "project.log")
 
+
+class LazyFileHandler(logging.FileHandler):
+    """
+    File handler that only creates the log directory and opens the file
+    when the first record is emitted.
+    """
+    def __init__(self, filename, mode='a', encoding=None):
+        super().__init__(filename, mode=mode, encoding=encoding, delay=True)
+
+    def _open(self):
+        directory = os.path.dirname(self.baseFilename)
+        os.makedirs(directory, exist_ok=True)
+        return super()._open()
+
+
 logging.basicConfig(
     level=logging.INFO,  # Set the logging level (DEBUG, INFO, WARNING, ERROR, CRITICAL)
     format="%(asctime)s - %(levelname)s - %(message)s",
     handlers=[
-        logging.FileHandler(LOG_FILE),  # Log to file
+        LazyFileHandler(LOG_FILE),  # Log to file
         logging.StreamHandler()        # Log to console
     ]
 )
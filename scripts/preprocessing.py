@@ -3,6 +3,7 @@ from utils.html_parser import parse_html, extract_main_content
 from utils.chunker import fixed_length_chunking
 from utils.helper import create_chunk_metadata
 from utils.text_cleaner import clean_text
+from utils.dedup import deduplicate_chunks
 
 def save_chunks_to_jsonl(chunks, output_file):
     # Import json here - this is unusual, typically imports should be at the top
@@ -15,7 +16,13 @@ def save_chunks_to_jsonl(chunks, output_file):
         for chunk in chunks:
             f.write(json.dumps(chunk) + '\n')
 
-def process_documents(input_dir, output_file):
+def save_dedup_report(report, report_file):
+    import json
+
+    with open(report_file, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+
+def process_documents(input_dir, output_file, dedup_threshold=0.8, dedup_report_file=None):
     all_chunks = []
     doc_counter = 0
     for filename in os.listdir(input_dir):
@@ -48,5 +55,14 @@ def process_documents(input_dir, output_file):
                         **metadata
                     }
                     all_chunks.append(chunk_data)
+
+    # Drop near-duplicate chunks (repeated boilerplate) before they get embedded
+    if dedup_threshold:
+        all_chunks, report = deduplicate_chunks(all_chunks, threshold=dedup_threshold)
+        print(f"Removed {report['duplicate_chunks']} of {report['total_chunks']} chunks "
+              f"({report['duplicate_words']} of {report['total_words']} words) as near-duplicates")
+        if dedup_report_file:
+            save_dedup_report(report, dedup_report_file)
+
     # Save all chunks to a JSONL file
     save_chunks_to_jsonl(all_chunks, output_file)
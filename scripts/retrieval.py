@@ -4,13 +4,41 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from typing import List, Dict
-from models.retrievers.elasticsearch_retriever import query_elasticsearch
-from models.retrievers.dense_retriever import load_faiss_index, query_faiss_index
-from sentence_transformers import SentenceTransformer
 from logging_config import logger
+from utils.metrics import metrics
 
 
 
+def load_dense_retriever(faiss_index_file: str, metadata_file: str, model_name: str = 'all-MiniLM-L6-v2') -> Dict:
+    """
+    Loads the FAISS index, chunk metadata and embedding model used for
+    dense retrieval, so they can be reused across queries.
+
+    Args:
+        faiss_index_file (str): Path to the FAISS index file.
+        metadata_file (str): Path to the metadata JSON file.
+        model_name (str): SentenceTransformer model name.
+
+    Returns:
+        Dict: Keyword arguments for `query_faiss_index_batch` ('index', 'model', 'metadata').
+    """
+    from models.retrievers.dense_retriever import load_embedding_model, load_faiss_index
+
+    #Load FAISS index
+    faiss_index= load_faiss_index(faiss_index_file)
+
+    #Load metadata
+    with metrics.timer('metadata_load'):
+        with open(metadata_file, 'r', encoding = 'utf-8') as f:
+            metadata = json.load(f)
+    logger.info(f"Loaded metadata for dense retrieval from {metadata_file}")
+
+    #Initialize embedding model 
+    model = load_embedding_model(model_name)
+
+    return {'index': faiss_index, 'model': model, 'metadata': metadata}
+
+
 def retrieve_documents(query:str, method:str, faiss_index_file: str, metadata_file: str, elasticsearch_index: str, top_k: int) -> List[Dict]:
     """
     Retrieves relevant document chunks based on the query.
@@ -26,41 +54,69 @@ def retrieve_documents(query:str, method:str, faiss_index_file: str, metadata_fi
     Returns:
         List[Dict]: List of retrieved document chunks.
     """
+    return retrieve_documents_batch(
+        queries=[query],
+        method=method,
+        faiss_index_file=faiss_index_file,
+        metadata_file=metadata_file,
+        elasticsearch_index=elasticsearch_index,
+        top_k=top_k
+    )[0]
+
+
+def retrieve_documents_batch(queries: List[str], method:str, faiss_index_file: str, metadata_file: str, elasticsearch_index: str, top_k: int, dense_retriever: Dict = None) -> List[List[Dict]]:
+    """
+    Retrieves relevant document chunks for a batch of queries. Dense queries
+    are embedded and searched together.
+
+    Args:
+        queries (List[str]): The user's natural language queries.
+        method (str): Retrieval method ('sparse', 'dense', 'hybrid').
+        faiss_index_file (str): Path to the FAISS index file.
+        metadata_file (str): Path to the metadata JSON file.
+        elasticsearch_index (str): Name of the Elasticsearch index.
+        top_k (int): Number of top chunks to retrieve per query.
+        dense_retriever (Dict, optional): Preloaded output of `load_dense_retriever`.
+            Loaded from `faiss_index_file` and `metadata_file` when omitted.
+
+    Returns:
+        List[List[Dict]]: One list of retrieved document chunks per query, in query order.
+    """
 
-    retrieved_chunks = []
+    retrieved_chunks = [[] for _ in queries]
 
+    # Retriever backends are imported per method so a sparse-only run never
+    # loads faiss, sentence_transformers or torch.
     if method in ['sparse']:
+        from models.retrievers.elasticsearch_retriever import query_elasticsearch
+
         #Sparse Retrieval using Elasticsearch
-        sparse_results = query_elasticsearch(query_text=query, index_name=elasticsearch_index, top_k = top_k)
-        retrieved_chunks.extend(sparse_results)
-        logger.info(f"Sparse retrieval returned {len(sparse_results)} chunks")
+        for query, chunks in zip(queries, retrieved_chunks):
+            sparse_results = query_elasticsearch(query_text=query, index_name=elasticsearch_index, top_k = top_k)
+            chunks.extend(sparse_results)
+            logger.info(f"Sparse retrieval returned {len(sparse_results)} chunks")
 
     if method in ['dense']:
         #Desne Retrieval using FAISS
+        from models.retrievers.dense_retriever import query_faiss_index_batch
 
-        #Load FAISS index
-        faiss_index= load_faiss_index(faiss_index_file)
-
-        #Load metadata
-        with open(metadata_file, 'r', encoding = 'utf-8') as f:
-            metadata = json.load(f)
-        logger.info("Loaded metadata for dense retrieval from {metadata_file}")
-
-        #Initialize embedding model 
-        model = SentenceTransformer('all-MiniLM-L6-v2')
-
+        if dense_retriever is None:
+            dense_retriever = load_dense_retriever(faiss_index_file, metadata_file)
 
         #Query FAISS index
-        dense_results = query_faiss_index(query_text=query, index=faiss_index, model=model, metadata=metadata, top_k= top_k)
-        retrieved_chunks.extend(dense_results)
+        dense_results = query_faiss_index_batch(query_texts=queries, top_k=top_k, **dense_retriever)
+        for chunks, results in zip(retrieved_chunks, dense_results):
+            chunks.extend(results)
     
     #If hybrid, consider removing duplicates or reranking
     if method == 'hybrid':
         #Remove duplicates based on 'chunk_id'
-        unique_chunks = {chunk['chunk_id']: chunk for chunk in retrieved_chunks}
-        retrieved_chunks = list(unique_chunks.values())
-        logger.info(f"Hybrid retrieval consolidated to {len(retrieved_chunks)} unique chunks.")
-    
+        for i, chunks in enumerate(retrieved_chunks):
+            unique_chunks = {chunk['chunk_id']: chunk for chunk in chunks}
+            retrieved_chunks[i] = list(unique_chunks.values())
+            logger.info(f"Hybrid retrieval consolidated to {len(retrieved_chunks[i])} unique chunks.")
+
+    metrics.inc('retrieved_chunks', sum(len(chunks) for chunks in retrieved_chunks))
     return retrieved_chunks
 
 
@@ -73,22 +129,30 @@ def main():
     parser.add_argument('--elasticsearch_index', type=str, default='legal_docs', help='Elasticsearch index name')
     parser.add_argument('--top_k', type=int, default=5, help='Number of top chunks to retrieve')
     parser.add_argument('--output_file', type=str, default='data/retrieved_chunks.json', help='Path to save retrieved chunks')
+    parser.add_argument('--metrics_file', type=str, default=None, help='Path to export stage metrics (.json for JSON, otherwise Prometheus text)')
 
     args = parser.parse_args()
 
-    # Retrieve document chunks
-    retrieved_chunks = retrieve_documents(
-        query=args.query,
-        method=args.method,
-        faiss_index_file=args.faiss_index_file,
-        metadata_file=args.metadata_file,
-        elasticsearch_index=args.elasticsearch_index,
-        top_k=args.top_k
-    )
-    # Save retrieved chunks to a file
-    with open(args.output_file, 'w', encoding='utf-8') as f:
-        json.dump(retrieved_chunks, f, indent=2)
-    logger.info(f"Retrieved chunks saved to {args.output_file}")
+    # Export metrics even when retrieval fails so the error counters are kept
+    try:
+        # Retrieve document chunks
+        with metrics.timer('retrieval'):
+            retrieved_chunks = retrieve_documents(
+                query=args.query,
+                method=args.method,
+                faiss_index_file=args.faiss_index_file,
+                metadata_file=args.metadata_file,
+                elasticsearch_index=args.elasticsearch_index,
+                top_k=args.top_k
+            )
+        # Save retrieved chunks to a file
+        with open(args.output_file, 'w', encoding='utf-8') as f:
+            json.dump(retrieved_chunks, f, indent=2)
+        logger.info(f"Retrieved chunks saved to {args.output_file}")
+    finally:
+        if args.metrics_file:
+            metrics.export(args.metrics_file)
+            logger.info(f"Metrics exported to {args.metrics_file}")
 
 if __name__ == '__main__':
     main()
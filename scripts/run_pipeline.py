@@ -1,64 +1,353 @@
 
 import argparse
-from retrieval import retrieve_documents
+from retrieval import retrieve_documents, retrieve_documents_batch, load_dense_retriever
 import sys
 import os
+import json
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from models.generators.generator import LangChainGenerator
 from  scripts.logging_config import logger
+from utils.metrics import metrics, profile
+
+NO_CHUNKS_ANSWER = "I'm sorry, I couldn't find relevant information to answer your question."
+
+# Marks the end of the retrieval stream in batch mode
+_DONE = object()
 
 
 def main():
     parser = argparse.ArgumentParser(description="Run the full RAG pipeline.")
-    parser.add_argument('--query', type=str, required=True, help='Natural language query')
+    query_group = parser.add_mutually_exclusive_group(required=True)
+    query_group.add_argument('--query', type=str, help='Natural language query')
+    query_group.add_argument('--queries_file', type=str, help='JSONL file of queries to answer in batch mode (one {"id", "query"} object per line)')
     parser.add_argument('--method', type=str, choices=['sparse', 'dense', 'hybrid'], default='hybrid', help='Retrieval method')
     parser.add_argument('--faiss_index_file', type=str, default='data/embeddings/faiss_index.index', help='Path to FAISS index file')
     parser.add_argument('--metadata_file', type=str, default='data/embeddings/chunk_metadata.json', help='Path to metadata JSON file')
     parser.add_argument('--elasticsearch_index', type=str, default='legal_docs', help='Elasticsearch index name')
     parser.add_argument('--model_name', type=str, default='gpt-3.5-turbo', help='LLM model name')
     parser.add_argument('--top_k', type=int, default=5, help='Number of top chunks to retrieve')
-    parser.add_argument('--output_file', type=str, default='results/answer.txt', help='Path to save the generated answer')
+    parser.add_argument('--output_file', type=str, default=None, help='Path to save the generated answer (default: results/answer.txt, or results/batch_answers.jsonl in batch mode)')
+    parser.add_argument('--batch_size', type=int, default=32, help='Number of queries retrieved together in batch mode')
+    parser.add_argument('--concurrency', type=int, default=4, help='Maximum number of concurrent LLM calls in batch mode')
+    parser.add_argument('--metrics_file', type=str, default=None, help='Path to export stage metrics (.json for JSON, otherwise Prometheus text)')
+    parser.add_argument('--profile_file', type=str, default=None, help='Path to dump cProfile stats for a single --query run (not supported in batch mode, which runs on several threads)')
 
     args = parser.parse_args()
 
+    if args.batch_size < 1:
+        parser.error('--batch_size must be at least 1')
+    if args.concurrency < 1:
+        parser.error('--concurrency must be at least 1')
+    # cProfile only sees the calling thread, while batch mode retrieves and
+    # generates on worker threads
+    if args.queries_file and args.profile_file:
+        parser.error('--profile_file cannot be combined with --queries_file')
+
+    # Export metrics even when the run fails so the error counters are kept
+    try:
+        if args.queries_file:
+            if args.output_file is None:
+                args.output_file = 'results/batch_answers.jsonl'
+            with metrics.timer('batch'):
+                run_batch(args)
+        else:
+            if args.output_file is None:
+                args.output_file = 'results/answer.txt'
+            run_single(args)
+    finally:
+        export_diagnostics(args)
+
+
+def run_single(args):
+    """
+    Answers `args.query` and saves or prints the answer.
+
+    Args:
+        args (argparse.Namespace): Parsed pipeline arguments.
+
+    Returns:
+        None
+    """
+    metrics.inc('queries')
+    with profile(args.profile_file), metrics.timer('pipeline'):
+        answer = answer_query(args)
+
+    # Step 3: Save or print the answer
+    try:
+        if args.output_file:
+            with open(args.output_file, 'w', encoding='utf-8') as f:
+                f.write(answer)
+            logger.info(f"Generated answer saved to {args.output_file}")
+        else:
+            print("Generated Answer:")
+            print(answer)
+    except Exception as e:
+        logger.error(f"Error saving or printing the answer: {e}")
+        raise
+
+
+def export_diagnostics(args):
+    if args.metrics_file:
+        metrics.export(args.metrics_file)
+        logger.info(f"Metrics exported to {args.metrics_file}")
+    if args.profile_file:
+        logger.info(f"Profile stats saved to {args.profile_file}")
+
+
+def answer_query(args) -> str:
+    """
+    Runs retrieval and generation for a single query.
+
+    Args:
+        args (argparse.Namespace): Parsed pipeline arguments.
+
+    Returns:
+        str: Generated answer.
+    """
     # Step 1: Retrieve document chunks
     try:
-        retrieved_chunks = retrieve_documents(
-            query=args.query,
-            method=args.method,
-            faiss_index_file=args.faiss_index_file,
-            metadata_file=args.metadata_file,
-            elasticsearch_index=args.elasticsearch_index,
-            top_k=args.top_k
-        )
+        with metrics.timer('retrieval'):
+            retrieved_chunks = retrieve_documents(
+                query=args.query,
+                method=args.method,
+                faiss_index_file=args.faiss_index_file,
+                metadata_file=args.metadata_file,
+                elasticsearch_index=args.elasticsearch_index,
+                top_k=args.top_k
+            )
     except Exception as e:
         logger.error(f"Error retrieving documents: {e}")
         raise
 
     if not retrieved_chunks:
         logger.warning("No chunks retrieved. Generating a default response.")
-        answer = "I'm sorry, I couldn't find relevant information to answer your question."
+        metrics.inc('empty_retrievals')
+        answer = NO_CHUNKS_ANSWER
     else:
         # Step 2: Generate answer using LLM
         try:
             generator = LangChainGenerator(model_name=args.model_name)
-            answer = generator.generate_answer(args.query, retrieved_chunks)
+            with metrics.timer('generation'):
+                answer = generator.generate_answer(args.query, retrieved_chunks)
         except Exception as e:
             logger.error(f"Error generating answer: {e}")
             raise
 
-    # Step 3: Save or print the answer
-    try:
-        if args.output_file:
-            with open(args.output_file, 'w', encoding='utf-8') as f:
-                f.write(answer)
-            logger.info(f"Generated answer saved to {args.output_file}")
-        else:
-            print("Generated Answer:")
-            print(answer)
-    except Exception as e:
-        logger.error(f"Error saving or printing the answer: {e}")
-        raise
+    return answer
+
+
+def load_queries(queries_file: str) -> List[Dict]:
+    """
+    Loads batch queries from a JSONL file. Each line holds a 'query' and an
+    optional 'id'; the line number is used as id when it is missing.
+
+    Args:
+        queries_file (str): Path to the JSONL file.
+
+    Returns:
+        List[Dict]: List of {'id', 'query'} dictionaries in file order.
+    """
+    queries = []
+    with open(queries_file, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            queries.append({'id': record.get('id', line_number), 'query': record['query']})
+    logger.info(f"Loaded {len(queries)} queries from {queries_file}")
+    return queries
+
+
+def load_completed(output_file: str) -> set:
+    """
+    Collects the ids already answered in a previous (possibly interrupted)
+    batch run. Records of failed generations and a truncated trailing line
+    left by a crash are dropped from the file, so those queries are retried
+    and new results can be appended after the rest.
+
+    Args:
+        output_file (str): Path to the batch output JSONL file.
+
+    Returns:
+        set: Ids of the queries that already have an answer.
+    """
+    if not os.path.exists(output_file):
+        return set()
+
+    records = []
+    dropped = 0
+    with open(output_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                dropped += 1
+                continue
+            if 'error' in record or record.get('answer') is None:
+                dropped += 1
+            else:
+                records.append(record)
+
+    if dropped:
+        logger.warning(f"Dropping {dropped} failed or partial records from {output_file}")
+        with open(output_file, 'w', encoding='utf-8') as f:
+            for record in records:
+                f.write(json.dumps(record) + '\n')
+
+    return {record['id'] for record in records}
+
+
+def sort_output(output_file: str, queries: List[Dict]):
+    """
+    Rewrites the batch output file in the order of `queries`. Records whose
+    id is not in `queries` are kept at the end.
+
+    Args:
+        output_file (str): Path to the batch output JSONL file.
+        queries (List[Dict]): Queries in input order.
+
+    Returns:
+        None
+    """
+    positions = {item['id']: position for position, item in enumerate(queries)}
+    with open(output_file, 'r', encoding='utf-8') as f:
+        records = [json.loads(line) for line in f if line.strip()]
+
+    # sorted() is stable, so unknown ids keep their relative order
+    records = sorted(records, key=lambda record: positions.get(record['id'], len(positions)))
+
+    # Write to a temporary file first so an interrupted rewrite loses nothing
+    tmp_file = f"{output_file}.tmp"
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record) + '\n')
+    os.replace(tmp_file, output_file)
+
+
+def run_batch(args):
+    """
+    Answers every query of `args.queries_file` and appends the results to
+    `args.output_file` as they complete, skipping queries already answered.
+    Once the run finishes, the file is rewritten in input order, so queries
+    retried on resume end up in their original position.
+
+    Retrieval runs in a background thread, `args.batch_size` queries at a
+    time, and hands each query to a pool of `args.concurrency` generation
+    workers. The bounded queue between the stages keeps retrieval from
+    running too far ahead of generation.
+
+    Args:
+        args (argparse.Namespace): Parsed pipeline arguments.
+
+    Returns:
+        None
+    """
+    queries = load_queries(args.queries_file)
+    completed = load_completed(args.output_file)
+    pending = [item for item in queries if item['id'] not in completed]
+    logger.info(f"{len(completed)} queries already answered, {len(pending)} remaining")
+    if not pending:
+        # An earlier run may have stopped before restoring the input order
+        if os.path.exists(args.output_file):
+            sort_output(args.output_file, queries)
+        return
+
+    # Load the index, metadata and models once for the whole run
+    dense_retriever = None
+    if args.method in ['dense']:
+        dense_retriever = load_dense_retriever(args.faiss_index_file, args.metadata_file)
+    generator = LangChainGenerator(model_name=args.model_name)
+
+    def generate(item: Dict, retrieved_chunks: List[Dict]) -> str:
+        if not retrieved_chunks:
+            metrics.inc('empty_retrievals')
+            return NO_CHUNKS_ANSWER
+        with metrics.timer('generation'):
+            return generator.generate_answer(item['query'], retrieved_chunks, raise_on_error=True)
+
+    in_flight = queue.Queue(maxsize=max(args.batch_size, args.concurrency) * 2)
+    stop = threading.Event()
+
+    def produce(executor: ThreadPoolExecutor):
+        try:
+            for start in range(0, len(pending), args.batch_size):
+                batch = pending[start:start + args.batch_size]
+                # Timed separately from the per-query 'retrieval' stage
+                with metrics.timer('retrieval_batch'):
+                    batch_chunks = retrieve_documents_batch(
+                        queries=[item['query'] for item in batch],
+                        method=args.method,
+                        faiss_index_file=args.faiss_index_file,
+                        metadata_file=args.metadata_file,
+                        elasticsearch_index=args.elasticsearch_index,
+                        top_k=args.top_k,
+                        dense_retriever=dense_retriever
+                    )
+                for item, retrieved_chunks in zip(batch, batch_chunks):
+                    if stop.is_set():
+                        return
+                    try:
+                        future = executor.submit(generate, item, retrieved_chunks)
+                    except RuntimeError:
+                        # The consumer shut the pool down after a failure
+                        return
+                    in_flight.put((item, retrieved_chunks, future))
+        except Exception as e:
+            logger.error(f"Error retrieving documents: {e}")
+            in_flight.put(e)
+        finally:
+            in_flight.put(_DONE)
+
+    directory = os.path.dirname(args.output_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor, \
+            open(args.output_file, 'a', encoding='utf-8') as f:
+        producer = threading.Thread(target=produce, args=(executor,), daemon=True)
+        producer.start()
+        try:
+            # Results are written in submission order, i.e. input order
+            while True:
+                entry = in_flight.get()
+                if entry is _DONE:
+                    break
+                if isinstance(entry, Exception):
+                    raise entry
+                item, retrieved_chunks, future = entry
+                record = {
+                    'id': item['id'],
+                    'query': item['query'],
+                    'answer': None,
+                    'chunk_ids': [chunk['chunk_id'] for chunk in retrieved_chunks],
+                }
+                # Failed generations are recorded with an error and retried on resume
+                try:
+                    record['answer'] = future.result()
+                except Exception as e:
+                    # Exceptions such as TimeoutError() have an empty message
+                    record['error'] = f"{type(e).__name__}: {e}"
+                f.write(json.dumps(record) + '\n')
+                f.flush()
+                metrics.inc('queries')
+        finally:
+            # When bailing out early, drop the queued LLM calls and unblock
+            # the producer instead of waiting for every submitted query
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            while producer.is_alive():
+                try:
+                    in_flight.get_nowait()
+                except queue.Empty:
+                    producer.join(timeout=0.1)
+
+    sort_output(args.output_file, queries)
+    logger.info(f"Batch answers saved to {args.output_file}")
+
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
@@ -19,7 +19,7 @@ class TestProcessDocuments(unittest.TestCase):
         mock_parse_html.return_value = MagicMock()
         mock_extract_content.return_value = 'Main content'
         mock_clean_text.side_effect = lambda x: x  # Return the input as is
-        mock_fixed_length_chunking.return_value = [{'content': 'Chunk 1', 'heading': 'Heading 1'}]
+        mock_fixed_length_chunking.return_value = ['Chunk 1']
         mock_create_metadata.return_value = {'document_id': 'test', 'index': 0, 'heading': 'Heading 1'}
 
         # Call the function
@@ -0,0 +1,47 @@
+import unittest
+from utils.dedup import deduplicate_chunks, lsh_bands, shingles
+
+BOILERPLATE = ("This lease is subject to the terms and conditions set forth in the master agreement "
+               "between the parties and no amendment shall be binding unless made in writing and "
+               "signed by both the landlord and the tenant of the premises described herein")
+
+class TestDeduplicateChunks(unittest.TestCase):
+
+    def test_drops_near_duplicates(self):
+        chunks = [
+            {'chunk_id': 'doc1_0', 'text': BOILERPLATE},
+            {'chunk_id': 'doc1_1', 'text': "The tenant shall pay rent on the first day of every month at the office of the landlord"},
+            {'chunk_id': 'doc2_0', 'text': BOILERPLATE + " herein"},
+            {'chunk_id': 'doc3_0', 'text': BOILERPLATE},
+        ]
+
+        kept, report = deduplicate_chunks(chunks, threshold=0.8)
+
+        self.assertEqual([chunk['chunk_id'] for chunk in kept], ['doc1_0', 'doc1_1'])
+        self.assertEqual(report['duplicate_chunks'], 2)
+        self.assertEqual(report['total_chunks'], 4)
+        self.assertEqual([d['duplicate_of'] for d in report['duplicates']], ['doc1_0', 'doc1_0'])
+        self.assertEqual(report['duplicate_words'], 2 * len(BOILERPLATE.split()) + 1)
+
+    def test_keeps_distinct_chunks(self):
+        chunks = [
+            {'chunk_id': 'a', 'text': "Lessee shall maintain insurance on the premises at its own cost"},
+            {'chunk_id': 'b', 'text': "Landlord may terminate this lease upon thirty days written notice"},
+        ]
+
+        kept, report = deduplicate_chunks(chunks)
+
+        self.assertEqual(kept, chunks)
+        self.assertEqual(report['duplicates'], [])
+
+    def test_lsh_bands_below_threshold(self):
+        bands, rows = lsh_bands(128, 0.8)
+        self.assertEqual(bands * rows, 128)
+        self.assertLessEqual((1 / bands) ** (1 / rows), 0.8)
+
+    def test_short_text_is_single_shingle(self):
+        self.assertEqual(shingles("Section 12 Repealed", size=5), {'section 12 repealed'})
+        self.assertEqual(shingles("", size=5), set())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import argparse
+import os
+import sys
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+import evaluate_retrieval
+
+METADATA = [
+    {'chunk_id': 'doc1_0', 'document_id': 'doc1', 'heading': None, 'text': 'a b c d e'},
+    {'chunk_id': 'doc2_0', 'document_id': 'doc2', 'heading': None, 'text': 'f g h'},
+]
+
+def results(*chunk_ids):
+    return [{'chunk_id': chunk_id} for chunk_id in chunk_ids]
+
+class TestRechunk(unittest.TestCase):
+
+    def test_sub_chunks_keep_parent(self):
+        sub_chunks = evaluate_retrieval.rechunk(METADATA, 2)
+
+        self.assertEqual([chunk['chunk_id'] for chunk in sub_chunks],
+                         ['doc1_0#0', 'doc1_0#1', 'doc1_0#2', 'doc2_0#0', 'doc2_0#1'])
+        self.assertEqual([chunk['parent_chunk_id'] for chunk in sub_chunks],
+                         ['doc1_0'] * 3 + ['doc2_0'] * 2)
+        self.assertEqual(sub_chunks[1]['text'], 'c d')
+        self.assertEqual(sub_chunks[1]['document_id'], 'doc1')
+
+    def test_effective_chunk_sizes(self):
+        self.assertEqual(evaluate_retrieval.effective_chunk_sizes([0, 2, 5, 1000], METADATA), [0, 2])
+
+    def test_effective_nprobes(self):
+        self.assertEqual(evaluate_retrieval.effective_nprobes([1, 2, 4, 8], 2), [1, 2])
+
+class TestEvaluate(unittest.TestCase):
+
+    def test_maps_sub_chunks_to_parents(self):
+        queries = [{'query': 'q', 'relevant_chunk_ids': ['doc2_0']}]
+        parents = {'doc1_0#0': 'doc1_0', 'doc1_0#1': 'doc1_0', 'doc2_0#0': 'doc2_0'}
+
+        def search(query, top_k):
+            return results('doc1_0#0', 'doc1_0#1', 'doc2_0#0')[:top_k]
+
+        scores = evaluate_retrieval.evaluate(queries, search, 3, parents=parents)
+
+        # The two doc1_0 sub-chunks collapse into one rank
+        self.assertEqual(scores['recall'], 1.0)
+        self.assertEqual(scores['mrr'], 0.5)
+        self.assertIsNone(scores['ann_recall'])
+        self.assertGreaterEqual(scores['p95_ms'], scores['p50_ms'])
+
+    def test_ann_recall_against_exact_ids(self):
+        queries = [{'query': 'q1', 'relevant_chunk_ids': ['a']}, {'query': 'q2', 'relevant_chunk_ids': ['x']}]
+        approximate = {'q1': results('a', 'b'), 'q2': results('c', 'z')}
+        exact_ids = [['a', 'b'], ['c', 'd']]
+
+        scores = evaluate_retrieval.evaluate(queries, lambda query, top_k: approximate[query], 2, exact_ids=exact_ids)
+
+        self.assertEqual(scores['ann_recall'], 0.75)
+        self.assertEqual(scores['recall'], 0.5)
+
+class TestSweepDense(unittest.TestCase):
+
+    @patch('models.retrievers.dense_retriever.query_faiss_index')
+    @patch('models.retrievers.dense_retriever.query_faiss_index_batch')
+    @patch('models.retrievers.dense_retriever.build_faiss_index')
+    @patch('retrieval.load_dense_retriever')
+    def test_row_per_configuration(self, mock_load, mock_build, mock_batch, mock_query):
+        mock_load.return_value = {'index': MagicMock(ntotal=2), 'model': MagicMock(), 'metadata': METADATA}
+        mock_build.side_effect = lambda embeddings, index_type, **kwargs: MagicMock(nlist=2)
+        mock_batch.return_value = [results('doc1_0', 'doc2_0')]
+        mock_query.return_value = results('doc1_0', 'doc2_0')
+        args = argparse.Namespace(
+            faiss_index_file=None, metadata_file=None, chunk_sizes=[0, 5000], index_types=['flat', 'ivf', 'hnsw'],
+            top_k=[1, 2], nlist=100, nprobe=[1, 8], ef_search=[16, 64], hnsw_m=32,
+        )
+        queries = [{'query': 'q', 'relevant_chunk_ids': ['doc1_0']}]
+
+        rows = evaluate_retrieval.sweep_dense(queries, args)
+
+        configs = [(row['index_type'], row['chunk_size'], row['nlist'], row['nprobe'], row['ef_search'], row['top_k']) for row in rows]
+        self.assertEqual(configs, [
+            ('flat', None, None, None, None, 1), ('flat', None, None, None, None, 2),
+            ('ivf', None, 2, 1, None, 1), ('ivf', None, 2, 1, None, 2),
+            ('ivf', None, 2, 2, None, 1), ('ivf', None, 2, 2, None, 2),
+            ('hnsw', None, None, None, 16, 1), ('hnsw', None, None, None, 16, 2),
+            ('hnsw', None, None, None, 64, 1), ('hnsw', None, None, None, 64, 2),
+        ])
+        self.assertEqual(rows[0]['recall'], 1.0)
+        self.assertEqual(rows[1]['ann_recall'], 1.0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCRIPTS_DIR = os.path.join(REPO_ROOT, 'scripts')
+
+# Wall-clock budget for importing a pipeline script, in seconds
+IMPORT_BUDGET = 1.0
+
+HEAVY_MODULES = ['torch', 'faiss', 'sentence_transformers', 'elasticsearch', 'langchain', 'openai', 'numpy']
+
+# Imports the module in a fresh interpreter and reports what it cost
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{'elapsed': elapsed, 'heavy': heavy}}))
+"""
+
+def probe_import(module, cwd):
+    code = PROBE.format(module=module, heavy=HEAVY_MODULES)
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([SCRIPTS_DIR, REPO_ROOT]))
+    output = subprocess.run([sys.executable, '-c', code], cwd=cwd, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+class TestImportTime(unittest.TestCase):
+
+    def test_scripts_import_without_heavy_dependencies(self):
+        for module in ['retrieval', 'run_pipeline', 'generator', 'indexing', 'evaluate_retrieval']:
+            with self.subTest(module=module), tempfile.TemporaryDirectory() as tmp_dir:
+                result = probe_import(module, tmp_dir)
+                self.assertEqual(result['heavy'], [])
+                self.assertLess(result['elapsed'], IMPORT_BUDGET)
+
+    def test_logging_config_does_not_create_logs_dir(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            probe_import('logging_config', tmp_dir)
+            self.assertFalse(os.path.exists(os.path.join(tmp_dir, 'logs')))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+import json
+import os
+import tempfile
+from utils.metrics import MetricsRegistry, profile
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_timer_records_stage(self):
+        with self.registry.timer('dense_search'):
+            pass
+        with self.registry.timer('dense_search'):
+            pass
+
+        stage = self.registry.to_dict()['stages']['dense_search']
+        self.assertEqual(stage['count'], 2)
+        self.assertGreaterEqual(stage['sum'], 0)
+
+    def test_timer_counts_errors(self):
+        with self.assertRaises(ValueError):
+            with self.registry.timer('llm_call'):
+                raise ValueError("boom")
+
+        data = self.registry.to_dict()
+        self.assertEqual(data['counters']['llm_call_errors'], 1)
+        self.assertEqual(data['stages']['llm_call']['count'], 1)
+
+    def test_prometheus_format(self):
+        self.registry.inc('queries')
+        self.registry.observe('index_load', 0.2)
+
+        text = self.registry.to_prometheus()
+        self.assertIn('rag_queries_total 1', text)
+        self.assertIn('rag_stage_duration_seconds_bucket{stage="index_load",le="0.1"} 0', text)
+        self.assertIn('rag_stage_duration_seconds_bucket{stage="index_load",le="0.25"} 1', text)
+        self.assertIn('rag_stage_duration_seconds_count{stage="index_load"} 1', text)
+
+    def test_export_json(self):
+        self.registry.inc('queries', 3)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            output_file = os.path.join(tmp_dir, 'metrics.json')
+            self.registry.export(output_file)
+            with open(output_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        self.assertEqual(data['counters']['queries'], 3)
+
+    def test_profile_dumps_stats(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            profile_file = os.path.join(tmp_dir, 'request.prof')
+            with profile(profile_file):
+                sum(range(100))
+            self.assertTrue(os.path.exists(profile_file))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,34 @@
+import unittest
+from utils.retrieval_metrics import recall_at_k, reciprocal_rank, ndcg_at_k, overlap_at_k, percentile, dedupe
+
+class TestRetrievalMetrics(unittest.TestCase):
+
+    def test_recall_at_k(self):
+        self.assertEqual(recall_at_k(['a', 'b', 'c'], ['b', 'd'], 3), 0.5)
+        self.assertEqual(recall_at_k(['a', 'b', 'c'], ['c'], 2), 0.0)
+        self.assertEqual(recall_at_k(['a'], [], 1), 0.0)
+
+    def test_reciprocal_rank(self):
+        self.assertEqual(reciprocal_rank(['a', 'b', 'c'], ['c']), 1 / 3)
+        self.assertEqual(reciprocal_rank(['a', 'b'], ['x']), 0.0)
+
+    def test_ndcg_at_k(self):
+        self.assertEqual(ndcg_at_k(['a', 'b'], ['a', 'b'], 2), 1.0)
+        self.assertAlmostEqual(ndcg_at_k(['x', 'a'], ['a'], 2), 0.6309, places=4)
+
+    def test_overlap_at_k(self):
+        self.assertEqual(overlap_at_k(['a', 'b', 'x'], ['a', 'b', 'c'], 3), 2 / 3)
+        self.assertEqual(overlap_at_k([], [], 3), 1.0)
+
+    def test_percentile(self):
+        values = [4, 1, 3, 2, 5]
+        self.assertEqual(percentile(values, 50), 3)
+        self.assertEqual(percentile(values, 100), 5)
+        self.assertAlmostEqual(percentile(values, 95), 4.8)
+        self.assertEqual(percentile([], 95), 0.0)
+
+    def test_dedupe(self):
+        self.assertEqual(dedupe(['a', 'b', 'a', 'c', 'b']), ['a', 'b', 'c'])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,161 @@
+import unittest
+from unittest.mock import patch, MagicMock
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'scripts'))
+import run_pipeline
+import retrieval
+
+def fake_retrieve(queries, **kwargs):
+    return [[{'chunk_id': f"{query}_0", 'text': query}] if query != 'empty' else [] for query in queries]
+
+class TestRunBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.queries_file = os.path.join(self.tmp_dir.name, 'queries.jsonl')
+        self.output_file = os.path.join(self.tmp_dir.name, 'out', 'answers.jsonl')
+        with open(self.queries_file, 'w', encoding='utf-8') as f:
+            for i, query in enumerate(['q0', 'empty', 'q2', 'q3', 'q4']):
+                f.write(json.dumps({'id': i, 'query': query}) + '\n')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def make_args(self):
+        return argparse.Namespace(
+            queries_file=self.queries_file, output_file=self.output_file, method='sparse',
+            faiss_index_file=None, metadata_file=None, elasticsearch_index='legal_docs',
+            model_name='gpt-4o', top_k=5, batch_size=2, concurrency=3,
+        )
+
+    def read_output(self):
+        with open(self.output_file, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f]
+
+    @patch('run_pipeline.LangChainGenerator')
+    @patch('run_pipeline.retrieve_documents_batch', side_effect=fake_retrieve)
+    def test_answers_in_input_order(self, mock_retrieve, mock_generator):
+        mock_generator.return_value.generate_answer.side_effect = lambda query, chunks, **kwargs: f"answer to {query}"
+
+        run_pipeline.run_batch(self.make_args())
+
+        records = self.read_output()
+        self.assertEqual([record['id'] for record in records], [0, 1, 2, 3, 4])
+        self.assertEqual(records[0]['answer'], 'answer to q0')
+        self.assertEqual(records[1]['answer'], run_pipeline.NO_CHUNKS_ANSWER)
+        self.assertEqual(records[2]['chunk_ids'], ['q2_0'])
+        self.assertEqual(mock_retrieve.call_count, 3)
+
+    @patch('run_pipeline.LangChainGenerator')
+    @patch('run_pipeline.retrieve_documents_batch', side_effect=fake_retrieve)
+    def test_resumes_from_partial_output(self, mock_retrieve, mock_generator):
+        mock_generator.return_value.generate_answer.side_effect = lambda query, chunks, **kwargs: f"answer to {query}"
+        os.makedirs(os.path.dirname(self.output_file))
+        with open(self.output_file, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'id': 0, 'query': 'q0', 'answer': 'old', 'chunk_ids': []}) + '\n')
+            f.write('{"id": 1, "que')
+
+        run_pipeline.run_batch(self.make_args())
+
+        records = self.read_output()
+        self.assertEqual([record['id'] for record in records], [0, 1, 2, 3, 4])
+        self.assertEqual(records[0]['answer'], 'old')
+        retrieved = [query for call in mock_retrieve.call_args_list for query in call.kwargs['queries']]
+        self.assertEqual(retrieved, ['empty', 'q2', 'q3', 'q4'])
+
+    @patch('run_pipeline.LangChainGenerator')
+    @patch('run_pipeline.retrieve_documents_batch', side_effect=fake_retrieve)
+    def test_retries_failed_generations_on_resume(self, mock_retrieve, mock_generator):
+        def flaky(query, chunks, **kwargs):
+            if query == 'q2':
+                raise RuntimeError("rate limited")
+            if query == 'q3':
+                raise TimeoutError()
+            return f"answer to {query}"
+        mock_generator.return_value.generate_answer.side_effect = flaky
+
+        run_pipeline.run_batch(self.make_args())
+
+        records = self.read_output()
+        self.assertEqual([record['id'] for record in records], [0, 1, 2, 3, 4])
+        self.assertEqual(records[2]['error'], 'RuntimeError: rate limited')
+        self.assertIsNone(records[2]['answer'])
+        self.assertEqual(records[3]['error'], 'TimeoutError: ')
+        self.assertIsNone(records[3]['answer'])
+
+        mock_retrieve.reset_mock()
+        mock_generator.return_value.generate_answer.side_effect = lambda query, chunks, **kwargs: f"answer to {query}"
+        run_pipeline.run_batch(self.make_args())
+
+        records = self.read_output()
+        self.assertEqual([record['id'] for record in records], [0, 1, 2, 3, 4])
+        self.assertEqual(records[2]['answer'], 'answer to q2')
+        self.assertEqual(records[3]['answer'], 'answer to q3')
+        self.assertNotIn('error', records[3])
+        retrieved = [query for call in mock_retrieve.call_args_list for query in call.kwargs['queries']]
+        self.assertEqual(retrieved, ['q2', 'q3'])
+
+    @patch('run_pipeline.LangChainGenerator')
+    @patch('run_pipeline.retrieve_documents_batch', side_effect=fake_retrieve)
+    def test_cancels_queued_generations_on_failure(self, mock_retrieve, mock_generator):
+        calls = []
+        def generate(query, chunks, **kwargs):
+            calls.append(query)
+            time.sleep(0.05)
+            return f"answer to {query}"
+        mock_generator.return_value.generate_answer.side_effect = generate
+        args = self.make_args()
+        args.concurrency = 1
+
+        with patch('run_pipeline.json.dumps', side_effect=OSError("disk full")), self.assertRaises(OSError):
+            run_pipeline.run_batch(args)
+
+        # Only the call in progress when the write failed may still run
+        self.assertLessEqual(len(calls), 2)
+
+class TestMain(unittest.TestCase):
+
+    @patch('run_pipeline.retrieve_documents', side_effect=RuntimeError("index missing"))
+    def test_exports_metrics_on_failure(self, mock_retrieve):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            metrics_file = os.path.join(tmp_dir, 'metrics.json')
+            argv = ['run_pipeline.py', '--query', 'q', '--output_file', os.path.join(tmp_dir, 'answer.txt'),
+                    '--metrics_file', metrics_file]
+            with patch.object(sys, 'argv', argv), self.assertRaises(RuntimeError):
+                run_pipeline.main()
+
+            with open(metrics_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        self.assertGreaterEqual(data['counters']['retrieval_errors'], 1)
+
+    @patch('retrieval.retrieve_documents', side_effect=RuntimeError("index missing"))
+    def test_retrieval_script_exports_metrics_on_failure(self, mock_retrieve):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            metrics_file = os.path.join(tmp_dir, 'metrics.json')
+            argv = ['retrieval.py', '--query', 'q', '--output_file', os.path.join(tmp_dir, 'chunks.json'),
+                    '--metrics_file', metrics_file]
+            with patch.object(sys, 'argv', argv), self.assertRaises(RuntimeError):
+                retrieval.main()
+
+            with open(metrics_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        self.assertGreaterEqual(data['counters']['retrieval_errors'], 1)
+
+    def test_rejects_profile_in_batch_mode(self):
+        argv = ['run_pipeline.py', '--queries_file', 'queries.jsonl', '--profile_file', 'batch.prof']
+        with patch.object(sys, 'argv', argv), patch('sys.stderr'), self.assertRaises(SystemExit):
+            run_pipeline.main()
+
+    def test_rejects_non_positive_batch_settings(self):
+        for flag in ['--batch_size', '--concurrency']:
+            argv = ['run_pipeline.py', '--queries_file', 'queries.jsonl', flag, '0']
+            with self.subTest(flag=flag), patch.object(sys, 'argv', argv), patch('sys.stderr'), self.assertRaises(SystemExit):
+                run_pipeline.main()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,110 @@
+import zlib
+from collections import defaultdict
+import numpy as np
+
+# Universal hashing (a * x + b) mod p over 32-bit shingle hashes
+MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+MAX_HASH = np.uint64((1 << 32) - 1)
+
+def shingles(text, size=5):
+    # Word n-grams; texts shorter than one shingle become a single shingle
+    words = text.lower().split()
+    if len(words) <= size:
+        return {' '.join(words)} if words else set()
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+def make_permutations(num_perm=128, seed=1):
+    rng = np.random.RandomState(seed)
+    # Coefficients below 2**31 keep a * x + b within uint64 for 32-bit x
+    a = rng.randint(1, 1 << 31, size=num_perm).astype(np.uint64)
+    b = rng.randint(0, 1 << 31, size=num_perm).astype(np.uint64)
+    return a, b
+
+def minhash_signature(shingle_set, permutations):
+    a, b = permutations
+    if not shingle_set:
+        return np.full(len(a), MAX_HASH, dtype=np.uint64)
+    hashes = np.array([zlib.crc32(s.encode('utf-8')) for s in shingle_set], dtype=np.uint64)
+    permuted = (np.outer(a, hashes) + b[:, None]) % MERSENNE_PRIME & MAX_HASH
+    return permuted.min(axis=1)
+
+def lsh_bands(num_perm, threshold):
+    # Picks the (bands, rows) split whose S-curve midpoint (1/b)^(1/r) is
+    # closest to the threshold from below, favouring recall over precision
+    best = None
+    for rows in range(1, num_perm + 1):
+        if num_perm % rows:
+            continue
+        bands = num_perm // rows
+        midpoint = (1 / bands) ** (1 / rows)
+        if midpoint <= threshold and (best is None or midpoint > best[2]):
+            best = (bands, rows, midpoint)
+    if best is None:
+        return num_perm, 1
+    return best[0], best[1]
+
+def deduplicate_chunks(chunks, threshold=0.8, num_perm=128, shingle_size=5, seed=1):
+    """
+    Drops chunks whose text is a near-duplicate of an earlier chunk, using
+    MinHash signatures over word shingles and LSH banding to find candidates.
+
+    Args:
+        chunks (list): Chunk dictionaries with 'text' and 'chunk_id'.
+        threshold (float): Estimated Jaccard similarity from which a chunk
+            counts as a duplicate.
+        num_perm (int): Number of MinHash permutations.
+        shingle_size (int): Number of words per shingle.
+        seed (int): Seed of the MinHash permutations.
+
+    Returns:
+        tuple: (kept chunks in input order, report dictionary). The report
+        links every dropped chunk to the kept chunk it duplicates.
+    """
+    permutations = make_permutations(num_perm, seed)
+    bands, rows = lsh_bands(num_perm, threshold)
+    buckets = defaultdict(list)
+    signatures = []
+
+    kept = []
+    duplicates = []
+    total_words = 0
+    duplicate_words = 0
+
+    for chunk in chunks:
+        num_words = len(chunk['text'].split())
+        total_words += num_words
+        signature = minhash_signature(shingles(chunk['text'], shingle_size), permutations)
+        band_keys = [(band, signature[band * rows:(band + 1) * rows].tobytes()) for band in range(bands)]
+
+        # Compare against the kept chunks sharing at least one band
+        best_match, best_similarity = None, 0.0
+        candidates = {position for key in band_keys for position in buckets.get(key, ())}
+        for position in candidates:
+            similarity = float(np.mean(signatures[position] == signature))
+            if similarity > best_similarity:
+                best_match, best_similarity = position, similarity
+
+        if best_match is not None and best_similarity >= threshold:
+            duplicate_words += num_words
+            duplicates.append({
+                'chunk_id': chunk.get('chunk_id'),
+                'duplicate_of': kept[best_match].get('chunk_id'),
+                'similarity': round(best_similarity, 3),
+            })
+            continue
+
+        for key in band_keys:
+            buckets[key].append(len(kept))
+        signatures.append(signature)
+        kept.append(chunk)
+
+    report = {
+        'threshold': threshold,
+        'total_chunks': len(chunks),
+        'kept_chunks': len(kept),
+        'duplicate_chunks': len(duplicates),
+        'total_words': total_words,
+        'duplicate_words': duplicate_words,
+        'duplicates': duplicates,
+    }
+    return kept, report
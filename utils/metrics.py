@@ -0,0 +1,173 @@
+import cProfile
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Upper bounds (in seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+METRIC_PREFIX = "rag"
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """
+        Cumulative histogram of observed values, Prometheus style.
+
+        Args:
+            buckets (tuple): Sorted upper bounds of the buckets.
+        """
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'buckets': {str(bound): n for bound, n in zip(self.buckets, self.counts)},
+        }
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """
+        Collects per-stage latencies and counters for the RAG pipeline.
+        """
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def inc(self, name: str, value: float = 1):
+        """
+        Increments the counter `name` by `value`.
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, stage: str, seconds: float):
+        """
+        Records a latency observation for a pipeline stage.
+        """
+        with self._lock:
+            if stage not in self.histograms:
+                self.histograms[stage] = Histogram()
+            self.histograms[stage].observe(seconds)
+
+    @contextmanager
+    def timer(self, stage: str):
+        """
+        Context manager timing the enclosed block as `stage`.
+
+        Errors raised inside the block are counted under `<stage>_errors`
+        and re-raised.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc(f"{stage}_errors")
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                'counters': dict(self.counters),
+                'stages': {stage: hist.to_dict() for stage, hist in self.histograms.items()},
+            }
+
+    def to_prometheus(self) -> str:
+        """
+        Renders the metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        with self._lock:
+            for name in sorted(self.counters):
+                metric = f"{METRIC_PREFIX}_{name}_total"
+                lines.append(f"# TYPE {metric} counter")
+                lines.append(f"{metric} {self.counters[name]}")
+
+            if self.histograms:
+                metric = f"{METRIC_PREFIX}_stage_duration_seconds"
+                lines.append(f"# TYPE {metric} histogram")
+                for stage in sorted(self.histograms):
+                    hist = self.histograms[stage]
+                    for bound, n in zip(hist.buckets, hist.counts):
+                        lines.append(f'{metric}_bucket{{stage="{stage}",le="{bound}"}} {n}')
+                    lines.append(f'{metric}_bucket{{stage="{stage}",le="+Inf"}} {hist.count}')
+                    lines.append(f'{metric}_sum{{stage="{stage}"}} {hist.sum}')
+                    lines.append(f'{metric}_count{{stage="{stage}"}} {hist.count}')
+        return "\n".join(lines) + "\n"
+
+    def export(self, output_file: str):
+        """
+        Writes the metrics to disk. Files ending in '.json' get a JSON dump,
+        anything else the Prometheus text format (e.g. for the node_exporter
+        textfile collector).
+
+        Args:
+            output_file (str): Path to the metrics file.
+
+        Returns:
+            None
+        """
+        directory = os.path.dirname(output_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        if output_file.endswith('.json'):
+            content = json.dumps(self.to_dict(), indent=2)
+        else:
+            content = self.to_prometheus()
+
+        # Write to a temporary file first so scrapers never see a partial file
+        tmp_file = f"{output_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            f.write(content)
+        os.replace(tmp_file, output_file)
+
+
+@contextmanager
+def profile(profile_file: str = None):
+    """
+    Runs the enclosed block under cProfile and dumps the stats to
+    `profile_file`. Does nothing when `profile_file` is None.
+
+    The dump can be inspected with `python -m pstats <profile_file>`.
+    """
+    if not profile_file:
+        yield
+        return
+
+    directory = os.path.dirname(profile_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        profiler.dump_stats(profile_file)
+
+
+# Process-wide registry used by the pipeline stages
+metrics = MetricsRegistry()
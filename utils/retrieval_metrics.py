@@ -0,0 +1,46 @@
+import math
+
+def recall_at_k(retrieved_ids, relevant_ids, k):
+    # Fraction of the relevant ids found in the first k results
+    if not relevant_ids:
+        return 0.0
+    found = set(retrieved_ids[:k]) & set(relevant_ids)
+    return len(found) / len(set(relevant_ids))
+
+def reciprocal_rank(retrieved_ids, relevant_ids):
+    relevant = set(relevant_ids)
+    for rank, retrieved_id in enumerate(retrieved_ids, 1):
+        if retrieved_id in relevant:
+            return 1.0 / rank
+    return 0.0
+
+def ndcg_at_k(retrieved_ids, relevant_ids, k):
+    # Binary relevance nDCG
+    relevant = set(relevant_ids)
+    dcg = sum(1.0 / math.log2(rank + 1)
+              for rank, retrieved_id in enumerate(retrieved_ids[:k], 1)
+              if retrieved_id in relevant)
+    ideal = sum(1.0 / math.log2(rank + 1) for rank in range(1, min(len(relevant), k) + 1))
+    return dcg / ideal if ideal else 0.0
+
+def overlap_at_k(retrieved_ids, reference_ids, k):
+    # Share of the reference top-k (e.g. exact search) that was also retrieved
+    reference = set(reference_ids[:k])
+    if not reference:
+        return 1.0
+    return len(set(retrieved_ids[:k]) & reference) / len(reference)
+
+def percentile(values, q):
+    # Linear interpolation between closest ranks, q in [0, 100]
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * q / 100
+    lower = math.floor(position)
+    upper = math.ceil(position)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+def dedupe(ids):
+    # Keeps the first occurrence of each id, preserving rank order
+    seen = set()
+    return [i for i in ids if not (i in seen or seen.add(i))]